@@ -68,13 +68,13 @@ func SaveInventoryCache(configDir string, devices []string, ttl time.Duration) e
 		ExpiresAt: time.Now().Add(ttl),
 	}
 
-	data, err := json.MarshalIndent(cache, "", "  ")
+	data, err := json.Marshal(cache)
 	if err != nil {
 		return fmt.Errorf("failed to marshal cache: %w", err)
 	}
 
 	cachePath := GetCachePath(configDir)
-	if err := os.WriteFile(cachePath, data, 0600); err != nil {
+	if err := writeFileAtomic(cachePath, data); err != nil {
 		return fmt.Errorf("failed to write cache file: %w", err)
 	}
 
@@ -3,6 +3,7 @@ package auth
 import (
 	"fmt"
 	"net/http"
+	"time"
 )
 
 // CLIAuthProvider implements AuthProvider for CLI using config and envvars
@@ -45,7 +46,7 @@ func (p *CLIAuthProvider) AddAuth(req *http.Request) error {
 }
 
 func (p *CLIAuthProvider) loadJWTToken() (string, error) {
-	t, err := LoadToken(p.config.ConfigDir)
+	t, err := LoadToken(p.config)
 	if err != nil {
 		return "", fmt.Errorf("failed to load token: %w", err)
 	}
@@ -59,12 +60,17 @@ func (p *CLIAuthProvider) loadJWTToken() (string, error) {
 		return t.IDToken, nil
 	}
 
-	if p.config.OAuthUseRefresh && t.RefreshToken != "" {
+	// Use any stored refresh token, even if oauth_use_refresh was turned off
+	// after login, before falling back to an interactive 'auth login'.
+	if t.RefreshToken != "" && (t.RefreshExpiresAt.IsZero() || time.Now().Before(t.RefreshExpiresAt)) {
 		refreshResponse, err := RefreshAccessToken(p.config, t.RefreshToken)
 		if err != nil {
-			return "", fmt.Errorf("failed to refresh access token: %w", err)
+			return "", fmt.Errorf("failed to refresh access token: %w; please re-authenticate with 'tom auth login'", err)
 		}
-		err = SaveToken(refreshResponse, p.config.ConfigDir, p.config.OAuthProvider)
+		if refreshResponse.IDToken == "" {
+			return "", fmt.Errorf("token refresh returned no id_token; please re-authenticate with 'tom auth login'")
+		}
+		err = SaveToken(refreshResponse, p.config)
 		if err != nil {
 			return "", fmt.Errorf("failed to save refreshed token: %w", err)
 		}
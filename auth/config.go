@@ -6,6 +6,7 @@ import (
 	"os"
 	"path/filepath"
 	"strings"
+	"sync"
 
 	"tomclient/auth/providers"
 )
@@ -60,7 +61,15 @@ func (c *Config) GetCacheTTL() int {
 	return c.CacheTTL
 }
 
+// GetConfigDir returns the default config directory. It depends only on the
+// environment, so it is resolved once per process.
 func GetConfigDir() string {
+	return defaultConfigDir()
+}
+
+var defaultConfigDir = sync.OnceValue(resolveConfigDir)
+
+func resolveConfigDir() string {
 	if dir := os.Getenv("TOM_CONFIG_DIR"); dir != "" {
 		return dir
 	}
@@ -104,14 +113,13 @@ func LoadConfig(configDir string) (*Config, error) {
 	}
 
 	configPath := GetConfigPath(cfg.ConfigDir)
-	if _, err := os.Stat(configPath); err == nil {
-		data, err := os.ReadFile(configPath)
-		if err != nil {
-			return nil, fmt.Errorf("failed to read config file: %w", err)
-		}
+	data, err := os.ReadFile(configPath)
+	if err == nil {
 		if err := json.Unmarshal(data, cfg); err != nil {
 			return nil, fmt.Errorf("failed to parse config file: %w", err)
 		}
+	} else if !os.IsNotExist(err) {
+		return nil, fmt.Errorf("failed to read config file: %w", err)
 	}
 	if cfg.Include != "" {
 		if cfg.Include == "config.json" {
@@ -192,10 +200,10 @@ func (c *Config) Validate() error {
 	switch c.AuthMode {
 	case AuthModeNone:
 		if c.APIKey != "" {
-			fmt.Println("Warning: TOM_API_KEY is set but auth_mode is 'none' - API key will not be used")
+			fmt.Fprintln(os.Stderr, "Warning: TOM_API_KEY is set but auth_mode is 'none' - API key will not be used")
 		}
 		if c.OAuthClientID != "" || c.OAuthDiscoveryURL != "" {
-			fmt.Println("Warning: OAuth config is set but auth_mode is 'none' - OAuth will not be used")
+			fmt.Fprintln(os.Stderr, "Warning: OAuth config is set but auth_mode is 'none' - OAuth will not be used")
 		}
 		return nil
 
@@ -204,7 +212,7 @@ func (c *Config) Validate() error {
 			return fmt.Errorf("auth_mode is 'api_key' but TOM_API_KEY is not set")
 		}
 		if c.OAuthClientID != "" || c.OAuthDiscoveryURL != "" {
-			fmt.Println("Warning: OAuth config is set but auth_mode is 'api_key' - OAuth will not be used")
+			fmt.Fprintln(os.Stderr, "Warning: OAuth config is set but auth_mode is 'api_key' - OAuth will not be used")
 		}
 		return nil
 
@@ -216,7 +224,7 @@ func (c *Config) Validate() error {
 			return fmt.Errorf("auth_mode is 'jwt' but TOM_OAUTH_DISCOVERY_URL is not set")
 		}
 		if c.APIKey != "" {
-			fmt.Println("Warning: TOM_API_KEY is set but auth_mode is 'jwt' - API key will not be used")
+			fmt.Fprintln(os.Stderr, "Warning: TOM_API_KEY is set but auth_mode is 'jwt' - API key will not be used")
 		}
 
 		provider, err := providers.GetProvider(c.OAuthProvider)
@@ -6,11 +6,15 @@ import (
 	"encoding/base64"
 	"encoding/json"
 	"fmt"
+	"html"
 	"io"
+	"net"
 	"net/http"
 	"net/url"
 	"os/exec"
 	"runtime"
+	"strconv"
+	"sync"
 	"time"
 
 	"tomclient/auth/providers"
@@ -29,22 +33,62 @@ type OAuthFlow struct {
 	State        string
 	Discovery    *OIDCDiscovery
 	Provider     providers.Provider
+
+	authURL string
 }
 
+// oauthHTTPClient is shared by all identity provider requests so discovery,
+// code exchange and refresh reuse pooled keep-alive connections.
+var oauthHTTPClient = &http.Client{Timeout: 30 * time.Second}
+
+// discoveryRetries is how many extra attempts a discovery fetch gets after a
+// transient gateway error.
+const discoveryRetries = 2
+
+// discoveryCache memoizes discovery documents by URL for the life of the process.
+var discoveryCache = struct {
+	sync.Mutex
+	docs map[string]*OIDCDiscovery
+}{docs: map[string]*OIDCDiscovery{}}
+
 func discoverOIDCEndpoints(discoveryURL string) (*OIDCDiscovery, error) {
-	resp, err := http.Get(discoveryURL)
-	if err != nil {
-		return nil, fmt.Errorf("failed to fetch OIDC discovery document: %w", err)
+	discoveryCache.Lock()
+	defer discoveryCache.Unlock()
+	if discovery, ok := discoveryCache.docs[discoveryURL]; ok {
+		return discovery, nil
+	}
+
+	var resp *http.Response
+	var body []byte
+	for attempt := 0; ; attempt++ {
+		var err error
+		resp, err = oauthHTTPClient.Get(discoveryURL)
+		if err != nil {
+			return nil, fmt.Errorf("failed to fetch OIDC discovery document: %w", err)
+		}
+		// Read the body fully so the connection can return to the pool
+		body, err = io.ReadAll(resp.Body)
+		resp.Body.Close()
+		if err != nil {
+			return nil, fmt.Errorf("failed to read OIDC discovery document: %w", err)
+		}
+
+		switch resp.StatusCode {
+		case http.StatusBadGateway, http.StatusServiceUnavailable, http.StatusGatewayTimeout:
+			if attempt < discoveryRetries {
+				time.Sleep(time.Duration(attempt+1) * 100 * time.Millisecond)
+				continue
+			}
+		}
+		break
 	}
-	defer resp.Body.Close()
 
 	if resp.StatusCode != 200 {
-		body, _ := io.ReadAll(resp.Body)
 		return nil, fmt.Errorf("OIDC discovery failed with status %d: %s", resp.StatusCode, string(body))
 	}
 
 	var discovery OIDCDiscovery
-	if err := json.NewDecoder(resp.Body).Decode(&discovery); err != nil {
+	if err := json.Unmarshal(body, &discovery); err != nil {
 		return nil, fmt.Errorf("failed to parse OIDC discovery document: %w", err)
 	}
 
@@ -52,6 +96,7 @@ func discoverOIDCEndpoints(discoveryURL string) (*OIDCDiscovery, error) {
 		return nil, fmt.Errorf("OIDC discovery document missing required endpoints")
 	}
 
+	discoveryCache.docs[discoveryURL] = &discovery
 	return &discovery, nil
 }
 
@@ -99,13 +144,19 @@ func generateState() (string, error) {
 	return base64.RawURLEncoding.EncodeToString(b), nil
 }
 
+// GetAuthURL returns the authorization URL for this flow. Its inputs are
+// fixed when the flow is created, so it is built once and reused.
 func (f *OAuthFlow) GetAuthURL() string {
+	if f.authURL != "" {
+		return f.authURL
+	}
+
 	challenge := GenerateCodeChallenge(f.CodeVerifier)
 
 	params := url.Values{
 		"response_type":         {"code"},
 		"client_id":             {f.Config.OAuthClientID},
-		"redirect_uri":          {fmt.Sprintf("http://localhost:%d/callback", f.Config.OAuthRedirectPort)},
+		"redirect_uri":          {f.redirectURI()},
 		"code_challenge":        {challenge},
 		"code_challenge_method": {"S256"},
 		"scope":                 {f.Config.OAuthScopes},
@@ -122,14 +173,64 @@ func (f *OAuthFlow) GetAuthURL() string {
 		}
 	}
 
-	return fmt.Sprintf("%s?%s", f.Discovery.AuthorizationEndpoint, params.Encode())
+	f.authURL = fmt.Sprintf("%s?%s", f.Discovery.AuthorizationEndpoint, params.Encode())
+	return f.authURL
 }
 
-func (f *OAuthFlow) StartCallbackServer(ctx context.Context) (string, error) {
-	codeChan := make(chan string, 1)
-	errChan := make(chan error, 1)
-	stateChan := make(chan string, 1)
+func (f *OAuthFlow) redirectURI() string {
+	return fmt.Sprintf("http://localhost:%d/callback", f.Config.OAuthRedirectPort)
+}
+
+// ListenCallback binds the callback port. It is called before the browser is
+// opened so a port conflict is reported up front and the redirect cannot
+// arrive before the server is listening.
+func (f *OAuthFlow) ListenCallback() (net.Listener, error) {
+	ln, err := net.Listen("tcp", fmt.Sprintf(":%d", f.Config.OAuthRedirectPort))
+	if err != nil {
+		return nil, fmt.Errorf("failed to listen on callback port %d: %w", f.Config.OAuthRedirectPort, err)
+	}
+	return ln, nil
+}
+
+// Pages returned to the browser by the callback server, built once.
+var (
+	callbackSuccessPage = []byte(`<html><body><h1>Authentication Successful!</h1><p>You can close this window and return to your terminal.</p><script>window.close();</script></body></html>`)
+	callbackNoCodePage  = []byte(`<html><body><h1>Authentication Failed</h1><p>No authorization code received</p></body></html>`)
+)
+
+const callbackErrorPageFormat = `<html><body><h1>Authentication Failed</h1><p>Error: %s</p></body></html>`
 
+func writeCallbackPage(w http.ResponseWriter, status int, page []byte) {
+	w.Header().Set("Content-Type", "text/html")
+	w.Header().Set("Content-Length", strconv.Itoa(len(page)))
+	w.WriteHeader(status)
+	w.Write(page)
+}
+
+// callbackShutdownTimeout bounds the graceful shutdown of the callback server.
+const callbackShutdownTimeout = time.Second
+
+// callbackResult is the outcome of a single OAuth redirect to the callback server.
+type callbackResult struct {
+	code  string
+	state string
+	err   error
+}
+
+// StartCallbackServer serves the OAuth redirect on ln until a code or error
+// arrives or ctx is done, then shuts the server down.
+func (f *OAuthFlow) StartCallbackServer(ctx context.Context, ln net.Listener) (string, error) {
+	// Buffered so the first result never blocks the handler; later ones are dropped.
+	done := make(chan callbackResult, 1)
+	signal := func(res callbackResult) {
+		select {
+		case done <- res:
+		default:
+		}
+	}
+
+	// Only /callback is routed; anything else (e.g. /favicon.ico) gets the
+	// mux's default 404 and leaves the server running.
 	mux := http.NewServeMux()
 	mux.HandleFunc("/callback", func(w http.ResponseWriter, r *http.Request) {
 		code := r.URL.Query().Get("code")
@@ -137,65 +238,67 @@ func (f *OAuthFlow) StartCallbackServer(ctx context.Context) (string, error) {
 		errorParam := r.URL.Query().Get("error")
 
 		if errorParam != "" {
-			errChan <- fmt.Errorf("OAuth error: %s", errorParam)
-			w.Header().Set("Content-Type", "text/html")
-			fmt.Fprintf(w, `<html><body><h1>Authentication Failed</h1><p>Error: %s</p></body></html>`, errorParam)
+			signal(callbackResult{err: fmt.Errorf("OAuth error: %s", errorParam)})
+			writeCallbackPage(w, http.StatusOK, []byte(fmt.Sprintf(callbackErrorPageFormat, html.EscapeString(errorParam))))
 			return
 		}
 
+		// Browsers may prefetch or probe the redirect URI before the real
+		// redirect; answer those without ending the flow.
 		if code == "" {
-			errChan <- fmt.Errorf("no authorization code received")
-			w.Header().Set("Content-Type", "text/html")
-			fmt.Fprint(w, `<html><body><h1>Authentication Failed</h1><p>No authorization code received</p></body></html>`)
+			writeCallbackPage(w, http.StatusBadRequest, callbackNoCodePage)
 			return
 		}
 
-		stateChan <- state
-		codeChan <- code
-		w.Header().Set("Content-Type", "text/html")
-		fmt.Fprint(w, `<html><body><h1>Authentication Successful!</h1><p>You can close this window and return to your terminal.</p><script>window.setTimeout(function(){window.close()}, 2000);</script></body></html>`)
+		signal(callbackResult{code: code, state: state})
+		writeCallbackPage(w, http.StatusOK, callbackSuccessPage)
 	})
 
-	srv := &http.Server{
-		Addr:    fmt.Sprintf(":%d", f.Config.OAuthRedirectPort),
-		Handler: mux,
-	}
+	srv := &http.Server{Handler: mux}
+	// Each browser request is one-shot; closing the connection after the
+	// response flushes it promptly and leaves nothing for Shutdown to wait on.
+	srv.SetKeepAlivesEnabled(false)
 
 	go func() {
-		if err := srv.ListenAndServe(); err != http.ErrServerClosed {
-			errChan <- err
+		if err := srv.Serve(ln); err != http.ErrServerClosed {
+			signal(callbackResult{err: err})
 		}
 	}()
 
-	defer srv.Shutdown(context.Background())
+	// Give the handler that delivered the result a moment to finish writing
+	// its page, but never hold up the login on a stuck browser connection.
+	defer func() {
+		shutdownCtx, cancel := context.WithTimeout(context.Background(), callbackShutdownTimeout)
+		defer cancel()
+		if err := srv.Shutdown(shutdownCtx); err != nil {
+			srv.Close()
+		}
+	}()
 
 	select {
-	case code := <-codeChan:
-		receivedState := <-stateChan
-		if receivedState != f.State {
+	case res := <-done:
+		if res.err != nil {
+			return "", res.err
+		}
+		if res.state != f.State {
 			return "", fmt.Errorf("state mismatch - possible CSRF attack")
 		}
-		return code, nil
-	case err := <-errChan:
-		return "", err
+		return res.code, nil
 	case <-ctx.Done():
 		return "", fmt.Errorf("authentication timed out")
-	case <-time.After(2 * time.Minute):
-		return "", fmt.Errorf("authentication timed out after 2 minutes")
 	}
 }
 
 func (f *OAuthFlow) ExchangeCodeForToken(code string) (*TokenResponse, error) {
-	redirectURI := fmt.Sprintf("http://localhost:%d/callback", f.Config.OAuthRedirectPort)
 	data := f.Provider.BuildTokenRequest(
 		code,
 		f.CodeVerifier,
 		f.Config.OAuthClientID,
 		f.Config.OAuthClientSecret,
-		redirectURI,
+		f.redirectURI(),
 	)
 
-	resp, err := http.PostForm(f.Discovery.TokenEndpoint, data)
+	resp, err := oauthHTTPClient.PostForm(f.Discovery.TokenEndpoint, data)
 	if err != nil {
 		return nil, fmt.Errorf("token request failed: %w", err)
 	}
@@ -232,7 +335,7 @@ func RefreshAccessToken(config *Config, refreshToken string) (*TokenResponse, er
 	}
 
 	data := provider.BuildRefreshRequest(refreshToken, config.OAuthClientID, config.OAuthClientSecret)
-	resp, err := http.PostForm(discovery.TokenEndpoint, data)
+	resp, err := oauthHTTPClient.PostForm(discovery.TokenEndpoint, data)
 	if err != nil {
 		return nil, fmt.Errorf("refresh request failed: %w", err)
 	}
@@ -262,12 +365,18 @@ func openBrowser(url string) error {
 	default:
 		return fmt.Errorf("unsupported platform")
 	}
-	return cmd.Start()
+	if err := cmd.Start(); err != nil {
+		return err
+	}
+	// Reap the helper without waiting on it; xdg-open can block until the
+	// browser it launched exits.
+	go cmd.Wait()
+	return nil
 }
 
 func Authenticate(config *Config) error {
 	// Always clear any previously stored tokens before a fresh login
-	if err := DeleteToken(config.ConfigDir); err != nil {
+	if err := DeleteToken(config); err != nil {
 		return fmt.Errorf("failed to clear existing token: %w", err)
 	}
 
@@ -276,22 +385,31 @@ func Authenticate(config *Config) error {
 		return fmt.Errorf("failed to initialize OAuth flow: %w", err)
 	}
 
+	ln, err := flow.ListenCallback()
+	if err != nil {
+		return err
+	}
+
 	authURL := flow.GetAuthURL()
 
 	fmt.Println("Opening browser for authentication...")
 	fmt.Printf("\nIf the browser doesn't open automatically, visit this URL:\n%s\n\n", authURL)
 
-	if err := openBrowser(authURL); err != nil {
-		fmt.Printf("Could not open browser automatically: %v\n", err)
-		fmt.Println("Please copy and paste the URL above into your browser.")
-	}
+	// The callback port is already bound, so the browser can be launched
+	// concurrently with starting the server.
+	go func() {
+		if err := openBrowser(authURL); err != nil {
+			fmt.Printf("Could not open browser automatically: %v\n", err)
+			fmt.Println("Please copy and paste the URL above into your browser.")
+		}
+	}()
 
 	fmt.Printf("Waiting for authentication (listening on http://localhost:%d/callback)...\n", config.OAuthRedirectPort)
 
 	ctx, cancel := context.WithTimeout(context.Background(), 2*time.Minute)
 	defer cancel()
 
-	code, err := flow.StartCallbackServer(ctx)
+	code, err := flow.StartCallbackServer(ctx, ln)
 	if err != nil {
 		return fmt.Errorf("failed to receive authorization code: %w", err)
 	}
@@ -303,7 +421,7 @@ func Authenticate(config *Config) error {
 		return fmt.Errorf("failed to exchange code for token: %w", err)
 	}
 
-	if err := SaveToken(token, config.ConfigDir, config.OAuthProvider); err != nil {
+	if err := SaveToken(token, config); err != nil {
 		return fmt.Errorf("failed to save token: %w", err)
 	}
 
@@ -0,0 +1,60 @@
+package auth
+
+import (
+	"context"
+	"fmt"
+	"net"
+	"net/http"
+	"testing"
+	"time"
+)
+
+func TestCallbackServerIgnoresStrayRequests(t *testing.T) {
+	ln, err := net.Listen("tcp", "127.0.0.1:0")
+	if err != nil {
+		t.Fatalf("Failed to listen: %v", err)
+	}
+	base := fmt.Sprintf("http://%s", ln.Addr())
+	flow := &OAuthFlow{Config: &Config{}, State: "expected-state"}
+
+	ctx, cancel := context.WithTimeout(context.Background(), 5*time.Second)
+	defer cancel()
+
+	type result struct {
+		code string
+		err  error
+	}
+	done := make(chan result, 1)
+	go func() {
+		code, err := flow.StartCallbackServer(ctx, ln)
+		done <- result{code, err}
+	}()
+
+	for _, path := range []string{"/favicon.ico", "/callback"} {
+		resp, err := http.Get(base + path)
+		if err != nil {
+			t.Fatalf("GET %s failed: %v", path, err)
+		}
+		resp.Body.Close()
+	}
+
+	select {
+	case res := <-done:
+		t.Fatalf("Expected server to keep waiting after stray requests, got code=%q err=%v", res.code, res.err)
+	default:
+	}
+
+	resp, err := http.Get(base + "/callback?code=abc&state=expected-state")
+	if err != nil {
+		t.Fatalf("GET callback failed: %v", err)
+	}
+	resp.Body.Close()
+
+	res := <-done
+	if res.err != nil {
+		t.Fatalf("Expected code, got error: %v", res.err)
+	}
+	if res.code != "abc" {
+		t.Errorf("Expected code 'abc', got '%s'", res.code)
+	}
+}
@@ -16,9 +16,8 @@ func GenerateCodeVerifier() (string, error) {
 }
 
 func GenerateCodeChallenge(verifier string) string {
-	h := sha256.New()
-	h.Write([]byte(verifier))
-	return base64URLEncode(h.Sum(nil))
+	sum := sha256.Sum256([]byte(verifier))
+	return base64URLEncode(sum[:])
 }
 
 func base64URLEncode(data []byte) string {
@@ -0,0 +1,13 @@
+package auth
+
+import "testing"
+
+func TestGenerateCodeChallenge(t *testing.T) {
+	// Test vector from RFC 7636 Appendix B
+	verifier := "dBjftJeZ4CVP-mB92K27uhbUJU1p1r_wW1gFWFOEjXk"
+	expected := "E9Melhoa2OwvFrEMTJguCHaoeK1t8URWbuGJSstw-cM"
+
+	if challenge := GenerateCodeChallenge(verifier); challenge != expected {
+		t.Errorf("Expected challenge %s, got %s", expected, challenge)
+	}
+}
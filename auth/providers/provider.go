@@ -13,15 +13,19 @@ type Provider interface {
 	RequiresClientSecret() bool
 }
 
+// providerFactories maps config provider names to constructors. Each call
+// returns a fresh provider since some carry per-flow settings.
+var providerFactories = map[string]func() Provider{
+	"":          func() Provider { return &OIDCProvider{} },
+	"oidc":      func() Provider { return &OIDCProvider{} },
+	"google":    func() Provider { return &GoogleProvider{} },
+	"microsoft": func() Provider { return &MicrosoftProvider{} },
+}
+
 func GetProvider(name string) (Provider, error) {
-	switch name {
-	case "oidc", "":
-		return &OIDCProvider{}, nil
-	case "google":
-		return &GoogleProvider{}, nil
-	case "microsoft":
-		return &MicrosoftProvider{}, nil
-	default:
+	newProvider, ok := providerFactories[name]
+	if !ok {
 		return nil, fmt.Errorf("unknown OAuth provider '%s' - must be one of: oidc, google, microsoft", name)
 	}
+	return newProvider(), nil
 }
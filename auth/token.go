@@ -1,15 +1,29 @@
 package auth
 
 import (
+	"crypto/sha256"
 	"encoding/base64"
+	"encoding/hex"
 	"encoding/json"
 	"fmt"
 	"os"
 	"path/filepath"
 	"strings"
+	"sync"
 	"time"
 )
 
+// tokenExpirySkew is how long before expiry a token is treated as expired, so
+// it is not presented to the API only to lapse mid-request.
+const tokenExpirySkew = 5 * time.Minute
+
+// tokenCache memoizes parsed token files by path for the life of the process;
+// every API request loads the token, so this avoids re-reading the file.
+var tokenCache = struct {
+	sync.Mutex
+	tokens map[string]StoredToken
+}{tokens: map[string]StoredToken{}}
+
 type TokenResponse struct {
 	AccessToken           string `json:"access_token"`
 	IDToken               string `json:"id_token"`
@@ -33,17 +47,28 @@ type StoredToken struct {
 	Provider         string    `json:"provider,omitempty"`
 }
 
-func GetTokenPath(configDir string) string {
-	if configDir == "" {
-		configDir = GetConfigDir()
-	}
-	return filepath.Join(configDir, "token.json")
+// legacyTokenFile is the single token file used before tokens were keyed by
+// OAuth client; it is still read as a fallback and removed on the next save.
+const legacyTokenFile = "token.json"
+
+// GetTokenPath returns the token file for cfg's OAuth client. The name is
+// keyed by a short hash of the client ID and discovery URL so profiles that
+// share a config directory but use different providers or tenants do not
+// overwrite each other's tokens.
+func GetTokenPath(cfg *Config) string {
+	sum := sha256.Sum256([]byte(cfg.OAuthClientID + "|" + cfg.OAuthDiscoveryURL))
+	return filepath.Join(tokenDir(cfg), fmt.Sprintf("token-%s.json", hex.EncodeToString(sum[:8])))
 }
 
-func SaveToken(token *TokenResponse, configDir string, provider string) error {
-	if configDir == "" {
-		configDir = GetConfigDir()
+func tokenDir(cfg *Config) string {
+	if cfg.ConfigDir == "" {
+		return GetConfigDir()
 	}
+	return cfg.ConfigDir
+}
+
+func SaveToken(token *TokenResponse, cfg *Config) error {
+	configDir := tokenDir(cfg)
 
 	if err := os.MkdirAll(configDir, 0700); err != nil {
 		return fmt.Errorf("failed to create config directory: %w", err)
@@ -52,7 +77,7 @@ func SaveToken(token *TokenResponse, configDir string, provider string) error {
 	// Preserve existing refresh_token if server does not return a new one
 	var existingRefresh string
 	var existingRefreshExpiresAt time.Time
-	if existing, err := LoadToken(configDir); err == nil && existing != nil {
+	if existing, err := LoadToken(cfg); err == nil && existing != nil {
 		existingRefresh = existing.RefreshToken
 		existingRefreshExpiresAt = existing.RefreshExpiresAt
 	}
@@ -81,29 +106,68 @@ func SaveToken(token *TokenResponse, configDir string, provider string) error {
 		ExpiresIn:        token.ExpiresIn,
 		ObtainedAt:       time.Now(),
 		ExpiresAt:        time.Now().Add(time.Duration(token.ExpiresIn) * time.Second),
-		Provider:         provider,
+		Provider:         cfg.OAuthProvider,
 		RefreshToken:     refresh,
 		RefreshExpiresIn: refreshExpiresIn,
 		RefreshExpiresAt: refreshExpiresAt,
 	}
 
-	data, err := json.MarshalIndent(stored, "", "  ")
+	data, err := json.Marshal(stored)
 	if err != nil {
 		return fmt.Errorf("failed to marshal token: %w", err)
 	}
 
-	tokenPath := GetTokenPath(configDir)
-	if err := os.WriteFile(tokenPath, data, 0600); err != nil {
+	tokenPath := GetTokenPath(cfg)
+	if err := writeFileAtomic(tokenPath, data); err != nil {
 		return fmt.Errorf("failed to write token file: %w", err)
 	}
+	os.Remove(filepath.Join(configDir, legacyTokenFile))
+
+	tokenCache.Lock()
+	tokenCache.tokens[tokenPath] = stored
+	tokenCache.Unlock()
 
 	return nil
 }
 
-func LoadToken(configDir string) (*StoredToken, error) {
-	tokenPath := GetTokenPath(configDir)
+// writeFileAtomic writes data to a 0600 temp file beside path and renames it
+// into place, so an interrupted write never leaves a truncated file behind.
+// The data is not fsynced; losing a token on power failure only costs a login.
+func writeFileAtomic(path string, data []byte) error {
+	// CreateTemp opens the file with mode 0600
+	f, err := os.CreateTemp(filepath.Dir(path), filepath.Base(path)+".tmp*")
+	if err != nil {
+		return err
+	}
+	tmpPath := f.Name()
+
+	_, err = f.Write(data)
+	if closeErr := f.Close(); err == nil {
+		err = closeErr
+	}
+	if err == nil {
+		err = os.Rename(tmpPath, path)
+	}
+	if err != nil {
+		os.Remove(tmpPath)
+		return err
+	}
+	return nil
+}
+
+func LoadToken(cfg *Config) (*StoredToken, error) {
+	tokenPath := GetTokenPath(cfg)
+
+	tokenCache.Lock()
+	defer tokenCache.Unlock()
+	if cached, ok := tokenCache.tokens[tokenPath]; ok {
+		return &cached, nil
+	}
 
 	data, err := os.ReadFile(tokenPath)
+	if os.IsNotExist(err) {
+		data, err = os.ReadFile(filepath.Join(tokenDir(cfg), legacyTokenFile))
+	}
 	if err != nil {
 		if os.IsNotExist(err) {
 			return nil, fmt.Errorf("not authenticated - run 'tomclient auth login' first")
@@ -116,21 +180,34 @@ func LoadToken(configDir string) (*StoredToken, error) {
 		return nil, fmt.Errorf("failed to parse token file: %w", err)
 	}
 
+	tokenCache.tokens[tokenPath] = token
 	return &token, nil
 }
 
 // IsValid returns whether the currently used token is valid.
 // For OIDC we use the ID token; validate by its exp when present.
 func (t *StoredToken) IsValid() bool {
+	skew := t.expirySkew()
 	if t.IDToken != "" {
 		if exp, ok := parseJWTExp(t.IDToken); ok {
-			return time.Now().Before(exp.Add(-60 * time.Second))
+			return time.Now().Before(exp.Add(-skew))
 		}
 		// If we cannot parse, be conservative and treat as expired
 		return false
 	}
 	// Fallback: access token expiry
-	return time.Now().Before(t.ExpiresAt.Add(-60 * time.Second))
+	return time.Now().Before(t.ExpiresAt.Add(-skew))
+}
+
+// expirySkew returns tokenExpirySkew, capped at a quarter of the token's
+// lifetime so short-lived tokens are not considered expired on arrival.
+func (t *StoredToken) expirySkew() time.Duration {
+	if t.ExpiresIn > 0 {
+		if quarter := time.Duration(t.ExpiresIn) * time.Second / 4; quarter < tokenExpirySkew {
+			return quarter
+		}
+	}
+	return tokenExpirySkew
 }
 
 // GetToken returns the ID token; we no longer fall back to access tokens.
@@ -160,10 +237,19 @@ func parseJWTExp(jwt string) (time.Time, bool) {
 	return time.Unix(claims.Exp, 0), true
 }
 
-func DeleteToken(configDir string) error {
-	tokenPath := GetTokenPath(configDir)
+func DeleteToken(cfg *Config) error {
+	tokenPath := GetTokenPath(cfg)
+
+	tokenCache.Lock()
+	delete(tokenCache.tokens, tokenPath)
+	tokenCache.Unlock()
+
 	if err := os.Remove(tokenPath); err != nil && !os.IsNotExist(err) {
 		return fmt.Errorf("failed to delete token file: %w", err)
 	}
+	legacyPath := filepath.Join(tokenDir(cfg), legacyTokenFile)
+	if err := os.Remove(legacyPath); err != nil && !os.IsNotExist(err) {
+		return fmt.Errorf("failed to delete token file: %w", err)
+	}
 	return nil
 }
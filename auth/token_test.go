@@ -0,0 +1,79 @@
+package auth
+
+import (
+	"os"
+	"path/filepath"
+	"testing"
+	"time"
+)
+
+func TestIsValidExpirySkew(t *testing.T) {
+	// A one-hour token with two minutes left falls inside the skew window
+	token := &StoredToken{ExpiresIn: 3600, ExpiresAt: time.Now().Add(2 * time.Minute)}
+	if token.IsValid() {
+		t.Errorf("Expected token expiring in 2m to be treated as expired")
+	}
+
+	// A two-minute token is only skewed by a quarter of its lifetime
+	token = &StoredToken{ExpiresIn: 120, ExpiresAt: time.Now().Add(2 * time.Minute)}
+	if !token.IsValid() {
+		t.Errorf("Expected fresh short-lived token to be valid")
+	}
+}
+
+func TestLoadTokenCache(t *testing.T) {
+	cfg := &Config{ConfigDir: t.TempDir(), OAuthClientID: "client"}
+
+	if err := SaveToken(&TokenResponse{IDToken: "first", ExpiresIn: 3600}, cfg); err != nil {
+		t.Fatalf("Failed to save token: %v", err)
+	}
+
+	// Removing the file behind the cache's back should not affect this process
+	if err := os.Remove(GetTokenPath(cfg)); err != nil {
+		t.Fatalf("Failed to remove token file: %v", err)
+	}
+	token, err := LoadToken(cfg)
+	if err != nil {
+		t.Fatalf("Failed to load cached token: %v", err)
+	}
+	if token.IDToken != "first" {
+		t.Errorf("Expected cached id_token 'first', got '%s'", token.IDToken)
+	}
+
+	if err := DeleteToken(cfg); err != nil {
+		t.Fatalf("Failed to delete token: %v", err)
+	}
+	if _, err := LoadToken(cfg); err == nil {
+		t.Errorf("Expected error loading token after DeleteToken")
+	}
+}
+
+func TestTokenPathPerClient(t *testing.T) {
+	dir := t.TempDir()
+	a := &Config{ConfigDir: dir, OAuthClientID: "a", OAuthDiscoveryURL: "https://idp.example.com"}
+	b := &Config{ConfigDir: dir, OAuthClientID: "b", OAuthDiscoveryURL: "https://idp.example.com"}
+
+	if GetTokenPath(a) == GetTokenPath(b) {
+		t.Fatalf("Expected distinct token paths for distinct clients, got %s", GetTokenPath(a))
+	}
+
+	// A pre-existing legacy token.json is read until the next save replaces it
+	legacy := filepath.Join(dir, "token.json")
+	if err := os.WriteFile(legacy, []byte(`{"id_token":"legacy"}`), 0600); err != nil {
+		t.Fatalf("Failed to write legacy token: %v", err)
+	}
+	token, err := LoadToken(a)
+	if err != nil {
+		t.Fatalf("Failed to load legacy token: %v", err)
+	}
+	if token.IDToken != "legacy" {
+		t.Errorf("Expected legacy id_token, got '%s'", token.IDToken)
+	}
+
+	if err := SaveToken(&TokenResponse{IDToken: "new", ExpiresIn: 3600}, a); err != nil {
+		t.Fatalf("Failed to save token: %v", err)
+	}
+	if _, err := os.Stat(legacy); !os.IsNotExist(err) {
+		t.Errorf("Expected legacy token.json to be removed after save")
+	}
+}
@@ -75,7 +75,7 @@ var authStatusCmd = &cobra.Command{
 			fmt.Printf("OAuth Client ID: %s\n", cfg.OAuthClientID)
 			fmt.Printf("OAuth Discovery URL: %s\n", cfg.OAuthDiscoveryURL)
 
-			token, err := auth.LoadToken(cfg.ConfigDir)
+			token, err := auth.LoadToken(cfg)
 			if err != nil {
 				fmt.Println("Status: ❌ Not authenticated - run 'tomclient auth login'")
 				return nil
@@ -116,7 +116,7 @@ var authLogoutCmd = &cobra.Command{
 			return fmt.Errorf("failed to load config: %w", err)
 		}
 
-		if err := auth.DeleteToken(cfg.ConfigDir); err != nil {
+		if err := auth.DeleteToken(cfg); err != nil {
 			return err
 		}
 